@@ -3,3 +3,9 @@
 # used api url's
 QEM_DASHBOARD = "http://dashboard.qam.suse.de/"
 SMELT = "https://smelt.suse.de/graphql"
+# (connect, read) timeouts for dashboard requests
+QEM_TIMEOUT = (3, 10)
+# workers running at once and threads per aggregate worker, the dashboard
+# connection pool is sized to serve all of them
+MAX_WORKERS = 4
+MAX_ARCH_THREADS = 8
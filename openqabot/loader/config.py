@@ -1,8 +1,9 @@
 # Copyright SUSE LLC
 # SPDX-License-Identifier: MIT
+from functools import lru_cache
 from logging import getLogger
 from pathlib import Path
-from typing import List, Set, Union
+from typing import FrozenSet, List, Set, Tuple, Union
 
 from ruamel.yaml import YAML  # type: ignore
 
@@ -13,16 +14,46 @@ from ..types.incidents import Incidents
 
 logger = getLogger("bot.loader.config")
 
+# path, mtime and size of a config file, changes whenever the file is modified
+Stamp = Tuple[str, int, int]
+
+
+def _stamp(path: Path) -> Stamp:
+    st = path.stat()
+    return str(path), st.st_mtime_ns, st.st_size
+
 
 def load_metadata(
     path: Path, aggregate: bool, incidents: bool, extrasettings: Set[str]
 ) -> List[Union[Aggregate, Incidents]]:
+    stamps = []
+    for p in path.glob("*.yml"):
+        try:
+            stamps.append(_stamp(p))
+        except OSError as e:
+            # dangling symlink or file removed meanwhile
+            logger.exception(e)
+
+    return list(
+        _load_metadata(
+            tuple(sorted(stamps)), aggregate, incidents, frozenset(extrasettings)
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _load_metadata(
+    stamps: Tuple[Stamp, ...],
+    aggregate: bool,
+    incidents: bool,
+    extrasettings: FrozenSet[str],
+) -> Tuple[Union[Aggregate, Incidents], ...]:
 
     ret: List[Union[Aggregate, Incidents]] = []
 
     loader = YAML(typ="safe")
 
-    for p in path.glob("*.yml"):
+    for p in (Path(stamp[0]) for stamp in stamps):
 
         try:
             data = loader.load(p)
@@ -55,7 +86,7 @@ def load_metadata(
                         )
                 else:
                     continue
-    return ret
+    return tuple(ret)
 
 
 def read_products(path: Path) -> List[Data]:
@@ -93,12 +124,23 @@ def read_products(path: Path) -> List[Data]:
 
 
 def get_onearch(path: Path) -> Set[str]:
+    try:
+        stamp = _stamp(path)
+    except OSError as e:
+        logger.exception(e)
+        return set()
+
+    return set(_get_onearch(stamp))
+
+
+@lru_cache(maxsize=None)
+def _get_onearch(stamp: Stamp) -> FrozenSet[str]:
     loader = YAML(typ="safe")
 
     try:
-        data = loader.load(path)
+        data = loader.load(Path(stamp[0]))
     except Exception as e:
         logger.exception(e)
-        return set()
+        return frozenset()
 
-    return set(data)
+    return frozenset(data)
@@ -5,6 +5,7 @@ from operator import itemgetter
 from pprint import pformat
 from typing import Dict, List, NamedTuple, Sequence
 
+import orjson
 import requests
 
 from .. import QEM_DASHBOARD
@@ -33,7 +34,9 @@ class JobAggr(NamedTuple):
 
 
 def get_incidents(token: Dict[str, str]) -> List[Incident]:
-    incidents = requests.get(QEM_DASHBOARD + "api/incidents", headers=token).json()
+    incidents = orjson.loads(
+        requests.get(QEM_DASHBOARD + "api/incidents", headers=token).content
+    )
 
     xs = []
     for i in incidents:
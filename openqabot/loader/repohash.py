@@ -1,5 +1,6 @@
 # Copyright SUSE LLC
 # SPDX-License-Identifier: MIT
+from functools import lru_cache
 from hashlib import md5
 from logging import getLogger
 from typing import List, Tuple
@@ -66,7 +67,8 @@ def get_max_revision(
     return max_rev
 
 
-def merge_repohash(hashes: List[str]) -> str:
+@lru_cache(maxsize=1024)
+def merge_repohash(hashes: Tuple[str, ...]) -> str:
     m = md5(b"start")
 
     for h in hashes:
@@ -1,12 +1,16 @@
 # Copyright SUSE LLC
 # SPDX-License-Identifier: MIT
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from logging import getLogger
 from os import environ
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from . import QEM_DASHBOARD
+from . import MAX_ARCH_THREADS, MAX_WORKERS, QEM_DASHBOARD, QEM_TIMEOUT
 from .loader.config import get_onearch, load_metadata
 from .loader.qem import get_incidents
 from .openqa import openQAInterface
@@ -20,8 +24,18 @@ class OpenQABot:
         self.dry = args.dry
         self.ignore_onetime = args.ignore_onetime
         self.token = {"Authorization": "Token " + args.token}
+        # one pooled session for all dashboard calls, keeps connections alive
+        self.session = requests.Session()
+        self.session.headers.update(self.token)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=MAX_WORKERS * MAX_ARCH_THREADS,
+            max_retries=Retry(total=3, backoff_factor=0.2),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.incidents = get_incidents(self.token)
-        logger.info("%s incidents loaded from qem dashboard" % len(self.incidents))
+        logger.info("%s incidents loaded from qem dashboard", len(self.incidents))
 
         extrasettings = get_onearch(args.singlearch)
 
@@ -35,13 +49,13 @@ class OpenQABot:
     def post_qem(self, data, api) -> None:
         if not self.openqa:
             logger.warning(
-                "Another instance of openqa : %s not posted to dashboard" % data
+                "Another instance of openqa : %s not posted to dashboard", data
             )
             return
 
         url = QEM_DASHBOARD + api
         try:
-            res = requests.put(url, headers=self.token, json=data)
+            res = self.session.put(url, json=data, timeout=QEM_TIMEOUT)
         # TODO: exceptions handling
         except Exception as e:
             logger.exception(e)
@@ -52,21 +66,42 @@ class OpenQABot:
 
     def __call__(self):
         logger.info("Starting bot mainloop")
-        post = []
-        for worker in self.workers:
-            post += worker(self.incidents, self.token, self.ci, self.ignore_onetime)
+        # workers only query services, so let them run concurrently
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            post = list(
+                chain.from_iterable(
+                    executor.map(
+                        lambda worker: worker(
+                            self.incidents, self.session, self.ci, self.ignore_onetime
+                        ),
+                        self.workers,
+                    )
+                )
+            )
 
         if self.dry:
-            logger.info("Would trigger %s products in openqa" % len(post))
+            logger.info("Would trigger %s products in openqa", len(post))
             for job in post:
                 logger.info(job)
 
         else:
-            logger.info("Triggering %s products in openqa" % len(post))
-            for job in post:
-                logger.info("Triggering %s" % str(job))
-                self.post_qem(job["qem"], job["api"])
-                self.post_openqa(job["openqa"])
+            logger.info("Triggering %s products in openqa", len(post))
+            # the dashboard update of the next job runs while the current job is
+            # posted to openQA. It is only sent once the update of the current
+            # job went through, so a failed update stops the run before any
+            # later job reaches the dashboard or openQA
+            with ThreadPoolExecutor(max_workers=1) as executor:
+
+                def submit_qem(job):
+                    return executor.submit(self.post_qem, job["qem"], job["api"])
+
+                future = submit_qem(post[0]) if post else None
+                for i, job in enumerate(post):
+                    logger.info("Triggering %s", job)
+                    future.result()
+                    if i + 1 < len(post):
+                        future = submit_qem(post[i + 1])
+                    self.post_openqa(job["openqa"])
 
         logger.info("End of bot run")
 
@@ -47,11 +47,17 @@ def fetch_matching_link(url, regex):
 
 # Gets the latest image from the given URL/regex
 # image is of the format 'URL/regex'
+# Several workers may look up the same image, so results are kept for the rest
+# of the process, including None when the directory could not be fetched
+@lru_cache(maxsize=128)
 def get_latest_pc_image(image):
     basepath, _, regex = image.rpartition("/")
     return fetch_matching_link(basepath, re.compile(regex))
 
 
+# Results are kept per query for the rest of the process. That includes None,
+# so a query without any passing build isn't retried until the next bot run
+@lru_cache(maxsize=128)
 def get_latest_tools_image(query):
     # 'publiccloud_tools_<BUILD NUM>.qcow2' is generic name for image used by Public Cloud tests to run
     # in openQA. query suppose to look like this "https://openqa.suse.de/group_overview/276.json" to get
@@ -1,15 +1,18 @@
 # Copyright SUSE LLC
 # SPDX-License-Identifier: MIT
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from itertools import chain
 from logging import getLogger
-from typing import Any, Dict, List, Optional
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
 
+import orjson
 import requests
 
 from . import ProdVer, Repos
-from .. import QEM_DASHBOARD
+from .. import MAX_ARCH_THREADS, QEM_DASHBOARD, QEM_TIMEOUT
 from ..errors import NoTestIssues, SameBuildExists
 from ..loader.repohash import merge_repohash
 from ..pc_helper import (
@@ -30,6 +33,14 @@ class Aggregate(BaseConf):
         self.archs = config["archs"]
         self.onetime = config.get("onetime", False)
         self.test_issues = self.normalize_repos(config)
+        # channels of the test issues per arch, looked up for every call
+        self.test_repos = {
+            arch: {
+                issue: Repos(template.product, template.version, arch)
+                for issue, template in self.test_issues.items()
+            }
+            for arch in self.archs
+        }
 
     @staticmethod
     def normalize_repos(config):
@@ -61,137 +72,188 @@ class Aggregate(BaseConf):
 
         return f"{build}-{counter}"
 
-    def __call__(
-        self,
-        incidents: List[Incident],
-        token: Dict[str, str],
-        ci_url: Optional[str],
-        ignore_onetime: bool = False,
-    ) -> List[Dict[str, Any]]:
-        ret = []
-
-        for arch in self.archs:
-            full_post: Dict["str", Any] = {}
-            full_post["openqa"] = {}
-            full_post["qem"] = {}
-            full_post["qem"]["incidents"] = []
-            full_post["qem"]["settings"] = {}
-            full_post["api"] = "api/update_settings"
-            if ci_url:
-                full_post["openqa"]["__CI_JOB_URL"] = ci_url
-
-            test_incidents = defaultdict(list)
-
-            # only testing queue and not livepatch
-            valid_incidents = [
-                i for i in incidents if not any((i.livepatch, i.staging))
-            ]
-            for issue, template in self.test_issues.items():
-                for inc in valid_incidents:
-                    if Repos(template.product, template.version, arch) in inc.channels:
-                        test_incidents[issue].append(inc)
-
-            full_post["openqa"]["REPOHASH"] = merge_repohash(
-                sorted(
-                    set(
-                        str(inc) for inc in chain.from_iterable(test_incidents.values())
-                    )
-                )
-            )
-
-            try:
-                old_jobs = requests.get(
+    def get_old_jobs(self, arch: str, session: requests.Session) -> Optional[List[Any]]:
+        try:
+            return orjson.loads(
+                session.get(
                     QEM_DASHBOARD + "api/update_settings",
                     params={"product": self.product, "arch": arch},
-                    headers=token,
-                ).json()
-            except Exception as e:
-                # TODO: valid exceptions ...
-                logger.exception(e)
-                old_jobs = None
-
-            old_repohash = old_jobs[0].get("repohash", "") if old_jobs else ""
-            old_build = old_jobs[0].get("build", "") if old_jobs else ""
-
-            try:
-                full_post["openqa"]["BUILD"] = self.get_buildnr(
-                    full_post["openqa"]["REPOHASH"], old_repohash, old_build
+                    timeout=QEM_TIMEOUT,
+                ).content
+            )
+        except Exception as e:
+            # TODO: valid exceptions ...
+            logger.exception(e)
+            return None
+
+    def _resolve_settings(self) -> Optional[Dict[str, Any]]:
+        settings = self.settings.copy()
+
+        # if set, we use this query to detect latest public cloud tools image which used for running
+        # all public cloud related tests in openQA
+        if "PUBLIC_CLOUD_TOOLS_IMAGE_QUERY" in settings:
+            query = settings["PUBLIC_CLOUD_TOOLS_IMAGE_QUERY"]
+            settings = apply_pc_tools_image(settings)
+            if not settings.get("PUBLIC_CLOUD_TOOLS_IMAGE_BASE", False):
+                logger.error(
+                    "Failed to query latest publiccloud tools image using %s", query
                 )
-            except SameBuildExists:
-                logger.info(
-                    "For %s aggreagate on %s there is existing build"
-                    % (self.product, arch)
+                return None
+
+        # parse Public-Cloud image REGEX if present
+        if "PUBLIC_CLOUD_IMAGE_REGEX" in settings:
+            settings = apply_publiccloud_regex(settings)
+            if not settings.get("PUBLIC_CLOUD_IMAGE_LOCATION", False):
+                logger.error(
+                    "No publiccloud image found for %s",
+                    settings["PUBLIC_CLOUD_IMAGE_REGEX"],
                 )
-                continue
-
-            if not ignore_onetime and (
-                self.onetime and full_post["openqa"]["BUILD"].split("-")[-1] != "1"
-            ):
-                continue
-
-            settings = self.settings.copy()
-
-            # if set, we use this query to detect latest public cloud tools image which used for running
-            # all public cloud related tests in openQA
-            if "PUBLIC_CLOUD_TOOLS_IMAGE_QUERY" in settings:
-                query = settings["PUBLIC_CLOUD_TOOLS_IMAGE_QUERY"]
-                settings = apply_pc_tools_image(settings)
-                if not settings.get("PUBLIC_CLOUD_TOOLS_IMAGE_BASE", False):
-                    logger.error(
-                        f"Failed to query latest publiccloud tools image using {query}"
-                    )
-                    continue
-
-            # parse Public-Cloud image REGEX if present
-            if "PUBLIC_CLOUD_IMAGE_REGEX" in settings:
-                settings = apply_publiccloud_regex(settings)
-                if not settings.get("PUBLIC_CLOUD_IMAGE_LOCATION", False):
-                    logger.error(
-                        f"No publiccloud image found for {settings['PUBLIC_CLOUD_IMAGE_REGEX']}"
-                    )
-                    continue
-            # parse Public-Cloud pint query if present
-            if "PUBLIC_CLOUD_PINT_QUERY" in settings:
-                settings = apply_publiccloud_pint_image(settings)
-                if not settings.get("PUBLIC_CLOUD_IMAGE_ID", False):
-                    logger.error(
-                        f"No publiccloud image fetched from pint for for {settings['PUBLIC_CLOUD_PINT_QUERY']}"
-                    )
-                    continue
-
-            full_post["openqa"].update(settings)
-            full_post["openqa"]["FLAVOR"] = self.flavor
-            full_post["openqa"]["ARCH"] = arch
-            full_post["openqa"]["_OBSOLETE"] = 1
-
-            for template, issues in test_incidents.items():
-                full_post["openqa"][template] = ",".join(str(x) for x in issues)
-            for issues in test_incidents.values():
-                full_post["qem"]["incidents"] += issues
-
-            full_post["qem"]["incidents"] = [
-                str(inc) for inc in set(full_post["qem"]["incidents"])
-            ]
-
-            if not full_post["qem"]["incidents"]:
-                continue
-
-            full_post["openqa"]["__DASHBOARD_INCIDENTS_URL"] = ",".join(
-                f"https://dashboard.qam.suse.de/incident/{inc}"
-                for inc in set(full_post["qem"]["incidents"])
+                return None
+        # parse Public-Cloud pint query if present
+        if "PUBLIC_CLOUD_PINT_QUERY" in settings:
+            settings = apply_publiccloud_pint_image(settings)
+            if not settings.get("PUBLIC_CLOUD_IMAGE_ID", False):
+                logger.error(
+                    "No publiccloud image fetched from pint for for %s",
+                    settings["PUBLIC_CLOUD_PINT_QUERY"],
+                )
+                return None
+
+        return settings
+
+    def _process_arch(
+        self,
+        arch: str,
+        channel_incidents: Dict[Repos, List[Incident]],
+        inc_strs: Dict[Incident, str],
+        get_settings: Callable[[], Optional[Dict[str, Any]]],
+        session: requests.Session,
+        ci_url: Optional[str],
+        ignore_onetime: bool,
+    ) -> Optional[Dict[str, Any]]:
+        full_post: Dict["str", Any] = {}
+        full_post["openqa"] = {}
+        full_post["qem"] = {}
+        full_post["qem"]["incidents"] = []
+        full_post["qem"]["settings"] = {}
+        full_post["api"] = "api/update_settings"
+        if ci_url:
+            full_post["openqa"]["__CI_JOB_URL"] = ci_url
+
+        test_incidents = {
+            issue: channel_incidents[repo]
+            for issue, repo in self.test_repos[arch].items()
+            if repo in channel_incidents
+        }
+
+        # nothing to test on this arch, skip the dashboard and image queries
+        if not test_incidents:
+            return None
+
+        old_jobs = self.get_old_jobs(arch, session)
+        old_repohash = old_jobs[0].get("repohash", "") if old_jobs else ""
+        old_build = old_jobs[0].get("build", "") if old_jobs else ""
+
+        # onetime aggregates get only the first build of a day
+        if (
+            self.onetime
+            and not ignore_onetime
+            and old_build.startswith(date.today().strftime("%Y%m%d"))
+        ):
+            logger.debug(
+                "For %s onetime aggregate on %s there is build of today",
+                self.product,
+                arch,
+            )
+            return None
+
+        incident_strs = sorted(
+            {inc_strs[inc] for inc in chain.from_iterable(test_incidents.values())}
+        )
+        # archs mostly share the same incidents, merge_repohash is cached
+        full_post["openqa"]["REPOHASH"] = merge_repohash(tuple(incident_strs))
+
+        try:
+            full_post["openqa"]["BUILD"] = self.get_buildnr(
+                full_post["openqa"]["REPOHASH"], old_repohash, old_build
             )
-            full_post["openqa"]["__SMELT_INCIDENTS_URL"] = ",".join(
-                f"https://smelt.suse.de/incident/{inc}"
-                for inc in set(full_post["qem"]["incidents"])
+        except SameBuildExists:
+            logger.info(
+                "For %s aggreagate on %s there is existing build", self.product, arch
             )
+            return None
+
+        settings = get_settings()
+        if settings is None:
+            return None
+
+        full_post["openqa"].update(settings)
+        full_post["openqa"]["FLAVOR"] = self.flavor
+        full_post["openqa"]["ARCH"] = arch
+        full_post["openqa"]["_OBSOLETE"] = 1
+
+        for template, issues in test_incidents.items():
+            full_post["openqa"][template] = ",".join(inc_strs[x] for x in issues)
 
-            full_post["qem"]["settings"] = full_post["openqa"]
-            full_post["qem"]["repohash"] = full_post["openqa"]["REPOHASH"]
-            full_post["qem"]["build"] = full_post["openqa"]["BUILD"]
-            full_post["qem"]["arch"] = full_post["openqa"]["ARCH"]
-            full_post["qem"]["product"] = self.product
+        full_post["qem"]["incidents"] = incident_strs
+        full_post["openqa"]["__DASHBOARD_INCIDENTS_URL"] = ",".join(
+            f"https://dashboard.qam.suse.de/incident/{inc}" for inc in incident_strs
+        )
+        full_post["openqa"]["__SMELT_INCIDENTS_URL"] = ",".join(
+            f"https://smelt.suse.de/incident/{inc}" for inc in incident_strs
+        )
 
-            # add to ret
-            ret.append(full_post)
+        full_post["qem"]["settings"] = full_post["openqa"]
+        full_post["qem"]["repohash"] = full_post["openqa"]["REPOHASH"]
+        full_post["qem"]["build"] = full_post["openqa"]["BUILD"]
+        full_post["qem"]["arch"] = full_post["openqa"]["ARCH"]
+        full_post["qem"]["product"] = self.product
 
-        return ret
+        return full_post
+
+    def __call__(
+        self,
+        incidents: List[Incident],
+        session: requests.Session,
+        ci_url: Optional[str],
+        ignore_onetime: bool = False,
+    ) -> List[Dict[str, Any]]:
+        if not self.archs:
+            return []
+
+        # only testing queue and not livepatch
+        valid_incidents = [i for i in incidents if not (i.livepatch or i.staging)]
+        inc_strs = {inc: str(inc) for inc in valid_incidents}
+        channel_incidents: Dict[Repos, List[Incident]] = defaultdict(list)
+        for inc in valid_incidents:
+            for channel in inc.channel_set:
+                channel_incidents[channel].append(inc)
+
+        # settings don't depend on the arch, the first arch that needs them
+        # resolves the public cloud queries and the others wait for it
+        settings_lock = Lock()
+        resolved: List[Optional[Dict[str, Any]]] = []
+
+        def get_settings() -> Optional[Dict[str, Any]]:
+            with settings_lock:
+                if not resolved:
+                    resolved.append(self._resolve_settings())
+            return resolved[0]
+
+        # archs are independent and mostly wait for the dashboard, run them at once
+        with ThreadPoolExecutor(
+            max_workers=min(MAX_ARCH_THREADS, len(self.archs))
+        ) as executor:
+            results = executor.map(
+                lambda arch: self._process_arch(
+                    arch,
+                    channel_incidents,
+                    inc_strs,
+                    get_settings,
+                    session,
+                    ci_url,
+                    ignore_onetime,
+                ),
+                self.archs,
+            )
+            return [r for r in results if r is not None]
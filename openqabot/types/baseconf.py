@@ -3,6 +3,8 @@
 from abc import ABCMeta, abstractmethod, abstractstaticmethod
 from typing import Any, Dict, List, Optional
 
+import requests
+
 from .incident import Incident
 
 
@@ -15,7 +17,7 @@ class BaseConf(metaclass=ABCMeta):
     def __call__(
         self,
         incidents: List[Incident],
-        token: Dict[str, str],
+        session: requests.Session,
         ci_url: Optional[str],
         ignore_onetime: bool,
     ) -> List[Dict[str, Any]]:
@@ -45,6 +45,8 @@ class Incident:
         ]
         if not self.channels:
             raise EmptyChannels(self.project)
+        # same channels as a set, for fast membership tests
+        self.channel_set = frozenset(self.channels)
 
         self.packages = sorted(incident["packages"], key=len)
         if not self.packages:
@@ -6,7 +6,7 @@ from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import requests
 
 from . import ArchVer, ProdVer, Repos
-from .. import QEM_DASHBOARD
+from .. import QEM_DASHBOARD, QEM_TIMEOUT
 from ..pc_helper import (
     apply_pc_tools_image,
     apply_publiccloud_pint_image,
@@ -51,13 +51,13 @@ class Incidents(BaseConf):
 
     @staticmethod
     def _is_scheduled_job(
-        token: Dict[str, str], inc: Incident, arch: str, ver: str, flavor: str
+        session: requests.Session, inc: Incident, arch: str, ver: str, flavor: str
     ) -> bool:
         jobs = {}
         try:
-            jobs = requests.get(
+            jobs = session.get(
                 f"{QEM_DASHBOARD}api/incident_settings/{inc.id}",
-                headers=token,
+                timeout=QEM_TIMEOUT,
             ).json()
         except Exception as e:
             # TODO: ....
@@ -82,7 +82,7 @@ class Incidents(BaseConf):
     def __call__(
         self,
         incidents: List[Incident],
-        token: Dict[str, str],
+        session: requests.Session,
         ci_url: Optional[str],
         ignore_onetime: bool,
     ) -> List[Dict[str, Any]]:
@@ -151,7 +151,7 @@ class Incidents(BaseConf):
 
                     for issue, channel in data["issues"].items():
                         f_channel = Repos(channel.product, channel.version, arch)
-                        if f_channel in inc.channels:
+                        if f_channel in inc.channel_set:
                             issue_dict[issue] = inc
                             channels_set.add(f_channel)
 
@@ -167,7 +167,7 @@ class Incidents(BaseConf):
                             continue
 
                     if not ignore_onetime and self._is_scheduled_job(
-                        token, inc, arch, self.settings["VERSION"], flavor
+                        session, inc, arch, self.settings["VERSION"], flavor
                     ):
                         logger.info(
                             "not scheduling: Flavor: %s, version: %s incident: %s , arch: %s  - exists in openQA "
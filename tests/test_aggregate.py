@@ -0,0 +1,169 @@
+# Copyright SUSE LLC
+# SPDX-License-Identifier: MIT
+import pytest
+import requests
+import responses
+
+from openqabot import QEM_DASHBOARD
+from openqabot.pc_helper import get_latest_tools_image
+from openqabot.types.aggregate import Aggregate
+from openqabot.types.incident import Incident
+
+REPOMD = """<?xml version="1.0" encoding="UTF-8"?>
+<repomd xmlns="http://linux.duke.edu/metadata/repo">
+  <revision>42</revision>
+</repomd>"""
+
+
+def add_repomd(number, channel):
+    responses.add(
+        responses.GET,
+        f"http://download.suse.de/ibs/SUSE:/Maintenance:/{number}/"
+        f"SUSE_Updates_{channel}/repodata/repomd.xml",
+        body=REPOMD,
+    )
+
+
+def get_incidents():
+    add_repomd(1, "SLES_15-SP3_x86_64")
+    add_repomd(1, "SLES_15-SP3_aarch64")
+    add_repomd(2, "SLES_15-SP3_x86_64")
+    add_repomd(3, "SLES_15-SP3_x86_64")
+    incs = [
+        {
+            "number": 1,
+            "rr_number": None,
+            "project": "SUSE:Maintenance:1",
+            "inReview": True,
+            "channels": [
+                "SUSE:Updates:SLES:15-SP3:x86_64",
+                "SUSE:Updates:SLES:15-SP3:aarch64",
+            ],
+            "packages": ["foo"],
+            "emu": False,
+        },
+        {
+            "number": 2,
+            "rr_number": None,
+            "project": "SUSE:Maintenance:2",
+            "inReview": True,
+            "channels": ["SUSE:Updates:SLES:15-SP3:x86_64"],
+            "packages": ["bar"],
+            "emu": False,
+        },
+        {
+            # staging incidents are not part of aggregates
+            "number": 3,
+            "rr_number": None,
+            "project": "SUSE:Maintenance:3",
+            "inReview": False,
+            "channels": ["SUSE:Updates:SLES:15-SP3:x86_64"],
+            "packages": ["baz"],
+            "emu": False,
+        },
+    ]
+    return [Incident(i) for i in incs]
+
+
+@pytest.fixture
+def aggregate():
+    config = {
+        "FLAVOR": "Server-DVD-Updates",
+        "archs": ["x86_64", "aarch64", "s390x"],
+        "test_issues": {"OS_TEST_ISSUES": "SLES:15-SP3"},
+    }
+    return Aggregate("SLES15SP3", {"DISTRI": "sle", "VERSION": "15-SP3"}, config)
+
+
+@responses.activate
+def test_aggregate_call(aggregate):
+    incidents = get_incidents()
+    responses.add(responses.GET, QEM_DASHBOARD + "api/update_settings", json=[])
+
+    ret = aggregate(incidents, requests.Session(), None)
+
+    assert [job["openqa"]["ARCH"] for job in ret] == ["x86_64", "aarch64"]
+    x86_64, aarch64 = ret
+    assert x86_64["openqa"]["OS_TEST_ISSUES"] == "1,2"
+    assert sorted(x86_64["qem"]["incidents"]) == ["1", "2"]
+    assert aarch64["openqa"]["OS_TEST_ISSUES"] == "1"
+    assert aarch64["qem"]["incidents"] == ["1"]
+    assert aarch64["openqa"]["BUILD"].endswith("-1")
+    assert aarch64["qem"]["product"] == "SLES15SP3"
+    assert x86_64["openqa"]["REPOHASH"] != aarch64["openqa"]["REPOHASH"]
+
+
+@responses.activate
+def test_aggregate_same_build(aggregate):
+    incidents = get_incidents()
+    responses.add(responses.GET, QEM_DASHBOARD + "api/update_settings", json=[])
+    first = aggregate(incidents, requests.Session(), None)
+
+    responses.replace(
+        responses.GET,
+        QEM_DASHBOARD + "api/update_settings",
+        json=[
+            {
+                "repohash": first[0]["openqa"]["REPOHASH"],
+                "build": first[0]["openqa"]["BUILD"],
+            }
+        ],
+    )
+
+    # x86_64 has nothing new, aarch64 differs and gets the next build of the day
+    ret = aggregate(incidents, requests.Session(), None)
+    assert len(ret) == 1
+    assert ret[0]["openqa"]["ARCH"] == "aarch64"
+    assert ret[0]["openqa"]["BUILD"].endswith("-2")
+
+
+@responses.activate
+def test_aggregate_queries(aggregate):
+    incidents = get_incidents()
+    responses.add(responses.GET, QEM_DASHBOARD + "api/update_settings", json=[])
+
+    aggregate(incidents, requests.Session(), None)
+
+    queries = [c for c in responses.calls if c.request.url.startswith(QEM_DASHBOARD)]
+    # one query per arch with incidents, s390x has none and isn't queried
+    assert len(queries) == 2
+
+
+@responses.activate
+def test_aggregate_onetime(aggregate):
+    incidents = get_incidents()
+    responses.add(responses.GET, QEM_DASHBOARD + "api/update_settings", json=[])
+    first = aggregate(incidents, requests.Session(), None)
+
+    responses.replace(
+        responses.GET,
+        QEM_DASHBOARD + "api/update_settings",
+        json=[{"repohash": "changed", "build": first[0]["openqa"]["BUILD"]}],
+    )
+    aggregate.onetime = True
+    assert aggregate(incidents, requests.Session(), None) == []
+    assert len(aggregate(incidents, requests.Session(), None, True)) == 2
+
+
+@responses.activate
+def test_aggregate_public_cloud_once(aggregate):
+    incidents = get_incidents()
+    responses.add(responses.GET, QEM_DASHBOARD + "api/update_settings", json=[])
+    query = "https://openqa.suse.de/group_overview/276.json"
+    responses.add(
+        responses.GET,
+        query,
+        json={"build_results": [{"failed": 0, "build": "42"}]},
+    )
+    get_latest_tools_image.cache_clear()
+    aggregate.settings["PUBLIC_CLOUD_TOOLS_IMAGE_QUERY"] = query
+
+    ret = aggregate(incidents, requests.Session(), None)
+
+    assert len(ret) == 2
+    for job in ret:
+        base = job["openqa"]["PUBLIC_CLOUD_TOOLS_IMAGE_BASE"]
+        assert base == "publiccloud_tools_42.qcow2"
+        assert "PUBLIC_CLOUD_TOOLS_IMAGE_QUERY" not in job["openqa"]
+    # resolved once for all archs
+    assert len([c for c in responses.calls if c.request.url == query]) == 1
@@ -0,0 +1,44 @@
+# Copyright SUSE LLC
+# SPDX-License-Identifier: MIT
+from openqabot.loader.config import get_onearch, load_metadata
+from openqabot.types.aggregate import Aggregate
+
+CONFIG = """product: SLES15SP3
+settings:
+  DISTRI: sle
+  VERSION: 15-SP3
+aggregate:
+  FLAVOR: Server-DVD-Updates
+  archs: [x86_64]
+  test_issues:
+    OS_TEST_ISSUES: SLES:15-SP3
+"""
+
+
+def test_load_metadata_cached(tmp_path):
+    config = tmp_path / "sles.yml"
+    config.write_text(CONFIG)
+
+    workers = load_metadata(tmp_path, False, True, set())
+    assert len(workers) == 1
+    assert isinstance(workers[0], Aggregate)
+    assert load_metadata(tmp_path, False, True, set()) == workers
+
+    config.write_text(CONFIG.replace("[x86_64]", "[x86_64, aarch64]"))
+    workers = load_metadata(tmp_path, False, True, set())
+    assert workers[0].archs == ["x86_64", "aarch64"]
+
+
+def test_load_metadata_broken_link(tmp_path):
+    (tmp_path / "sles.yml").write_text(CONFIG)
+    (tmp_path / "gone.yml").symlink_to(tmp_path / "missing.yml")
+
+    assert len(load_metadata(tmp_path, False, True, set())) == 1
+
+
+def test_get_onearch(tmp_path):
+    singlearch = tmp_path / "singlearch.yml"
+    assert get_onearch(singlearch) == set()
+
+    singlearch.write_text("- foo\n- bar\n")
+    assert get_onearch(singlearch) == {"foo", "bar"}
@@ -2,13 +2,80 @@
 # Copyright SUSE LLC
 # SPDX-License-Identifier: MIT
 
-import pytest
+import json
 import sys
+from argparse import Namespace
+from urllib.parse import urlparse
+
+import pytest
+import requests
+import responses
 
+from openqabot import QEM_DASHBOARD
 from openqabot.main import main  # SUT
+from openqabot.openqabot import OpenQABot
 
 
 def test_help():
     sys.argv += "--help".split()
     with pytest.raises(SystemExit):
         main()
+
+
+@pytest.fixture
+def bot(tmp_path):
+    args = Namespace(
+        dry=False,
+        ignore_onetime=False,
+        token="ToKeN",
+        singlearch=tmp_path / "singlearch.yml",
+        configs=tmp_path,
+        disable_aggregates=False,
+        disable_incidents=False,
+        openqa_instance=urlparse("https://openqa.suse.de"),
+    )
+    with responses.RequestsMock() as rsps:
+        rsps.add(responses.GET, QEM_DASHBOARD + "api/incidents", json=[])
+        bot = OpenQABot(args)
+
+    jobs = [
+        {"api": "api/update_settings", "qem": {"id": i}, "openqa": {"id": i}}
+        for i in range(6)
+    ]
+    bot.workers = [lambda *args: jobs]
+    bot.posted = []
+    bot.post_openqa = bot.posted.append
+    return bot
+
+
+@responses.activate
+def test_trigger(bot):
+    responses.add(responses.PUT, QEM_DASHBOARD + "api/update_settings")
+
+    assert bot() == 0
+
+    assert bot.posted == [{"id": i} for i in range(6)]
+    assert len(responses.calls) == 6
+    assert responses.calls[0].request.headers["Authorization"] == "Token ToKeN"
+
+
+@pytest.mark.parametrize("failing", [0, 2, 5])
+@responses.activate
+def test_trigger_dashboard_failure(bot, failing):
+    def put(request):
+        if json.loads(request.body)["id"] == failing:
+            return requests.ConnectionError("dashboard down")
+        return (200, {}, "")
+
+    responses.add_callback(
+        responses.PUT, QEM_DASHBOARD + "api/update_settings", callback=put
+    )
+
+    with pytest.raises(requests.ConnectionError):
+        bot()
+
+    # the run stops at the failed update: no later job reaches the dashboard
+    # and no openQA job is posted without its dashboard record
+    updated = [json.loads(c.request.body)["id"] for c in responses.calls]
+    assert updated == list(range(failing + 1))
+    assert bot.posted == [{"id": i} for i in range(failing)]